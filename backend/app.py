@@ -1,13 +1,15 @@
 from flask import Flask, render_template, request, redirect, url_for, session, jsonify
 import json
 import os
-from ml_model import RecipeRecommender
+from ml_model import RecipeRecommender, CATEGORICAL_FACETS, NUMERIC_FACETS
+from similar_recipes import SimilarRecipeIndex
 
 app = Flask(__name__)
 app.secret_key = 'super_secret_key_change_this_prod'  # Required for session
 
 # Global Recommender Instance
 recommender = RecipeRecommender()
+similar_index = SimilarRecipeIndex()
 unique_ingredients = set()
 
 def load_data_and_train():
@@ -20,9 +22,19 @@ def load_data_and_train():
         # Build unique ingredients set
         print("Building unique ingredients list...")
         # Add normalization rules
-        unique_ingredients = set(recommender.normalization_map.keys())
+        unique_ingredients = set(recommender.term_ids.keys())
         
         print(f"Data loaded, model trained. {len(unique_ingredients)} unique ingredient terms.")
+
+        # "More like this" table is built offline; loading it keeps worker
+        # startup fast. Without it the similar endpoints return []
+        if not similar_index.load():
+            print("No similar-recipe table found. Run `python similar_recipes.py` to build it.")
+        else:
+            missing = similar_index.missing(recommender)
+            if missing:
+                print(f"Similar-recipe table is missing {missing} recipes. "
+                      "Run `python similar_recipes.py` to update it.")
         
     except Exception as e:
         print(f"Error loading data: {e}")
@@ -32,6 +44,25 @@ def load_data_and_train():
 # Train on startup
 load_data_and_train()
 
+def parse_filters(args):
+    """
+    Read facet filters from query params, e.g.
+    ?diet=vegetarian&course=dessert&course=snack&max_total_time=30&min_rating=4.5
+    Malformed numeric values are ignored.
+    """
+    filters = {}
+    for facet in CATEGORICAL_FACETS:
+        values = [v for v in args.getlist(facet) if v.strip()]
+        if values:
+            filters[facet] = values
+    for facet in NUMERIC_FACETS:
+        for key in (f"min_{facet}", f"max_{facet}"):
+            try:
+                filters[key] = float(args[key])
+            except (KeyError, ValueError):
+                pass
+    return filters
+
 @app.route('/')
 def home():
     return render_template("home.html")
@@ -79,9 +110,12 @@ def recipes():
     if not user_ingredients:
         return redirect(url_for('ingredients'))
 
+    # Facet filters narrow the candidate set before scoring
+    filters = parse_filters(request.args)
+
     # Get recommendations from ML model
     # Pass list directly (new recommender handles list or string)
-    recommendations = recommender.recommend(user_ingredients, top_n=50)
+    recommendations = recommender.recommend(user_ingredients, top_n=50, filters=filters)
     
     processed_recs = []
     
@@ -114,7 +148,9 @@ def recipes():
 
     return render_template("recipes.html",
                            recipes=processed_recs,
-                           ingredients=user_ingredients)
+                           ingredients=user_ingredients,
+                           filters=filters,
+                           facet_options={f: recommender.facet_values(f) for f in ("diet", "course", "region")})
 
 @app.route('/api/feedback', methods=['POST'])
 def feedback():
@@ -131,9 +167,52 @@ def feedback():
     
     if recipe_id and action in ['select', 'reject']:
         recommender.update_feedback(recipe_id, action)
-        return jsonify({"status": "success", "message": "Feedback recorded"}), 200
+        response = {"status": "success", "message": "Feedback recorded"}
+        if action == 'select':
+            response["similar"] = similar_recipes_for(recipe_id)
+        return jsonify(response), 200
         
     return jsonify({"status": "error", "message": "Invalid input"}), 400
 
+def similar_recipes_for(recipe_id, limit=5):
+    results = []
+    for neighbor_id, similarity in similar_index.similar(recipe_id)[:limit]:
+        rec = recommender.get_recipe(neighbor_id)
+        if rec:
+            results.append({"id": neighbor_id, "recipe_name": rec.name, "similarity": round(similarity, 3)})
+    return results
+
+@app.route('/api/recipes/<recipe_id>/similar')
+def similar_recipes(recipe_id):
+    """
+    "More like this": precomputed nearest neighbours by ingredient overlap.
+    """
+    if recommender.get_recipe(recipe_id) is None:
+        return jsonify({"status": "error", "message": "Unknown recipe"}), 404
+    limit = request.args.get('limit', similar_index.k, type=int)
+    limit = max(0, min(limit, similar_index.k))
+    return jsonify(similar_recipes_for(recipe_id, limit=limit))
+
+@app.route('/api/best_purchases')
+def best_purchases():
+    """
+    Shopping list query: which k ingredients should the user buy to unlock the most recipes?
+    Query params: ingredients (comma-separated, defaults to the session pantry), k (1-MAX_PURCHASE_K)
+    """
+    raw = request.args.get('ingredients')
+    if raw is not None:
+        pantry = [i.strip() for i in raw.split(",") if i.strip()]
+    else:
+        pantry = session.get('user_ingredients', [])
+
+    try:
+        k = int(request.args.get('k', 1))
+    except ValueError:
+        k = 0
+    if not 1 <= k <= recommender.MAX_PURCHASE_K:
+        return jsonify({"status": "error", "message": f"k must be between 1 and {recommender.MAX_PURCHASE_K}"}), 400
+
+    return jsonify(recommender.best_purchases(pantry, k=k))
+
 if __name__ == "__main__":
     app.run(debug=True)
@@ -40,8 +40,8 @@ def debug_recommender():
         rec_norm = set()
         for ing in r['ingredients']:
             n = rec._clean_text(ing)
-            if n in rec.normalization_map:
-                rec_norm.add(rec.normalization_map[n])
+            if n in rec.term_ids:
+                rec_norm.add(rec.vocab[rec.term_ids[n]])
             else:
                 rec_norm.add(rec._singularize(n))
                 
@@ -2,6 +2,7 @@ import pandas as pd
 import json
 import os
 import ast
+import re
 
 def clean_ingredients(ing_str):
     if pd.isna(ing_str):
@@ -26,6 +27,82 @@ def clean_steps(steps_str):
     except:
         return [str(steps_str)]
 
+def clean_facet(value):
+    """
+    Categorical facet (diet, course, region...): lowercase string,
+    or None for blanks and the dataset's -1 placeholder.
+    """
+    if pd.isna(value):
+        return None
+    value = str(value).strip().lower()
+    if value in ('', '-1'):
+        return None
+    return value
+
+def parse_minutes(value):
+    """
+    Time facet to whole minutes: 45, "45", "1 hrs 15 mins", "1 day 2 hrs".
+    Returns None when unknown (blank, NaN or -1).
+    """
+    if pd.isna(value):
+        return None
+    try:
+        minutes = int(float(value))
+        return minutes if minutes >= 0 else None
+    except (TypeError, ValueError):
+        pass
+    text = str(value).lower()
+    units = {'day': 1440, 'hr': 60, 'hour': 60, 'min': 1}
+    total = 0
+    found = False
+    for amount, unit in re.findall(r'(\d+)\s*(day|hour|hr|min)', text):
+        total += int(amount) * units[unit]
+        found = True
+    return total if found else None
+
+def parse_rating(value):
+    if pd.isna(value):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def extract_facets(row, file_type):
+    """
+    Filterable metadata kept alongside each recipe.
+    Missing values are stored as None so every imported recipe has the same keys.
+    """
+    facets = {
+        "diet": None,
+        "course": None,
+        "flavor_profile": None,
+        "region": None,
+        "cuisine_path": None,
+        "prep_time": None,
+        "cook_time": None,
+        "total_time": None,
+        "rating": None,
+    }
+    if file_type == 'indian':
+        facets["diet"] = clean_facet(row.get('diet'))
+        facets["course"] = clean_facet(row.get('course'))
+        facets["flavor_profile"] = clean_facet(row.get('flavor_profile'))
+        facets["region"] = clean_facet(row.get('region'))
+        facets["prep_time"] = parse_minutes(row.get('prep_time'))
+        facets["cook_time"] = parse_minutes(row.get('cook_time'))
+        if facets["prep_time"] is not None and facets["cook_time"] is not None:
+            facets["total_time"] = facets["prep_time"] + facets["cook_time"]
+    else:
+        facets["prep_time"] = parse_minutes(row.get('prep_time'))
+        facets["cook_time"] = parse_minutes(row.get('cook_time'))
+        facets["total_time"] = parse_minutes(row.get('total_time'))
+        facets["rating"] = parse_rating(row.get('rating'))
+        path = row.get('cuisine_path')
+        if not pd.isna(path) and str(path).strip('/ '):
+            facets["cuisine_path"] = str(path)
+    return facets
+
 def main():
     all_recipes = []
     current_id = 1
@@ -89,12 +166,14 @@ def main():
                             break
                 
                 if name and ingredients:
-                    all_recipes.append({
+                    recipe = {
                         "id": current_id,
                         "name": str(name).title(),
                         "ingredients": [str(i).lower() for i in ingredients],
                         "steps": steps if steps else ["Cook until done."]
-                    })
+                    }
+                    recipe.update(extract_facets(row, f['type']))
+                    all_recipes.append(recipe)
                     current_id += 1
                     
         except Exception as e:
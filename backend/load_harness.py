@@ -0,0 +1,352 @@
+"""
+Local load-testing harness for the Foodie Genie Flask app.
+
+Starts the app under gunicorn on localhost (in a scratch directory, so the
+feedback write path never touches the real model_weights.json), then drives
+the HTTP routes concurrently and reports throughput, p50/p95/p99 latency and
+error rates per route.
+
+Usage (from the backend folder):
+    python load_harness.py --workers 4 --concurrency 16 --duration 30
+    python load_harness.py --url http://127.0.0.1:8000   # reuse a running server
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from ml_model import RecipeRecommender
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Relative weight of each user scenario in the traffic mix
+SCENARIO_MIX = {
+    "suggestions": 0.5,
+    "search": 0.35,
+    "feedback": 0.15,
+}
+
+
+def build_query_pool(recipes_path):
+    """
+    Build realistic inputs from the ingredient vocabulary: cleaned ingredient
+    terms for autocomplete, and pantry lists sampled from real recipes so that
+    searches hit the same distribution as actual users.
+    """
+    with open(recipes_path, "r") as f:
+        recipes = json.load(f)
+
+    rec = RecipeRecommender()
+    pantries = []
+    vocab = set()
+    for r in recipes:
+        cleaned = [rec._clean_text(i) for i in r.get('ingredients', [])]
+        cleaned = [c for c in cleaned if c]
+        vocab.update(cleaned)
+        if cleaned:
+            pantries.append(cleaned)
+
+    return {
+        "vocab": sorted(vocab),
+        "pantries": pantries,
+        "recipe_ids": [r['id'] for r in recipes if 'id' in r],
+    }
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.feedback = []  # (completed at, recipe id, action) for every accepted feedback POST
+
+    def record(self, route, elapsed, ok):
+        with self.lock:
+            self.latencies.setdefault(route, []).append(elapsed)
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+    def record_feedback(self, recipe_id, action):
+        with self.lock:
+            self.feedback.append((time.perf_counter(), str(recipe_id), action))
+
+    def report(self, wall_time):
+        print(f"\n{'route':<22}{'reqs':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>10}")
+        total = 0
+        for route in sorted(self.latencies):
+            values = sorted(self.latencies[route])
+            errors = self.errors.get(route, 0)
+            total += len(values)
+            print(f"{route:<22}{len(values):>8}{len(values) / wall_time:>10.1f}"
+                  f"{percentile(values, 50) * 1000:>10.1f}"
+                  f"{percentile(values, 95) * 1000:>10.1f}"
+                  f"{percentile(values, 99) * 1000:>10.1f}"
+                  f"{100.0 * errors / len(values):>9.1f}%")
+        print(f"\nTotal: {total} requests in {wall_time:.1f}s ({total / wall_time:.1f} req/s)")
+
+
+class VirtualUser:
+    """
+    One simulated browser: keeps its own cookie jar so the
+    /ingredients -> /recipes session flow behaves like a real client.
+    """
+
+    def __init__(self, base_url, pool, stats, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.pool = pool
+        self.stats = stats
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+            NoRedirect(),
+        )
+
+    def _call(self, route, path, data=None, headers=None, expect=(200,)):
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers or {})
+        start = time.perf_counter()
+        try:
+            with self.opener.open(req, timeout=self.timeout) as resp:
+                resp.read()
+                status = resp.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except Exception:
+            status = None
+        self.stats.record(route, time.perf_counter() - start, status in expect)
+        return status
+
+    def suggestions(self):
+        term = random.choice(self.pool["vocab"])
+        prefix = term[:random.randint(2, max(2, min(len(term), 6)))]
+        self._call("GET /api/suggestions", "/api/suggestions?" + urllib.parse.urlencode({"q": prefix}))
+
+    def search(self):
+        pantry = random.choice(self.pool["pantries"])
+        picked = random.sample(pantry, random.randint(1, min(len(pantry), 4)))
+        body = urllib.parse.urlencode({"ingredients": ", ".join(picked)}).encode()
+        status = self._call("POST /ingredients", "/ingredients", data=body,
+                            headers={"Content-Type": "application/x-www-form-urlencoded"},
+                            expect=(302, 303))
+        if status in (302, 303):
+            self._call("GET /recipes", "/recipes")
+
+    def feedback(self):
+        recipe_id = random.choice(self.pool["recipe_ids"])
+        action = random.choice(["select", "reject"])
+        body = json.dumps({"recipe_id": recipe_id, "action": action}).encode()
+        status = self._call("POST /api/feedback", "/api/feedback", data=body,
+                            headers={"Content-Type": "application/json"})
+        if status == 200:
+            self.stats.record_feedback(recipe_id, action)
+
+    def run(self, deadline):
+        names = list(SCENARIO_MIX)
+        weights = [SCENARIO_MIX[n] for n in names]
+        while time.time() < deadline:
+            getattr(self, random.choices(names, weights)[0])()
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Surface redirects to the caller so each hop is timed as its own route."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+def check_feedback_writes(weights_path, initial_weights, events):
+    """
+    /api/feedback answers 200 even when the weights file write fails, so
+    status codes alone cannot catch regressions in the write path. Replay
+    the accepted feedback (in completion order, with the same +/-0.1 and
+    0.1 floor as RecipeRecommender.update_feedback) and compare with what
+    actually landed in model_weights.json. Returns True if they agree.
+    """
+    print("\nFeedback write path:")
+    try:
+        with open(weights_path, "r") as f:
+            saved = json.load(f)
+    except FileNotFoundError:
+        saved = {}
+        if events:
+            print(f"  FAILED: {len(events)} feedback requests accepted but model_weights.json was never written.")
+            return False
+    except ValueError as e:
+        print(f"  FAILED: model_weights.json does not parse: {e}")
+        return False
+
+    expected = dict(initial_weights)
+    for _, recipe_id, action in sorted(events):
+        current = expected.get(recipe_id, 1.0)
+        if action == 'select':
+            expected[recipe_id] = current + 0.1
+        else:
+            expected[recipe_id] = max(0.1, current - 0.1)
+
+    touched = {recipe_id for _, recipe_id, _ in events}
+    selects = sum(1 for _, _, action in events if action == 'select')
+    lost = 0
+    wrong = 0
+    for recipe_id in touched:
+        diff = abs(expected.get(recipe_id, 1.0) - float(saved.get(recipe_id, 1.0)))
+        if diff > 1e-6:
+            wrong += 1
+            lost += max(1, round(diff / 0.1))
+
+    print(f"  sent {len(events)} accepted events ({selects} select, {len(events) - selects} reject) on {len(touched)} recipes")
+    print(f"  recipes with the expected weight: {len(touched) - wrong}/{len(touched)}")
+    if wrong:
+        # Typically several workers each saving their own in-memory weights over one another
+        print(f"  FAILED: about {lost} feedback events missing from model_weights.json")
+        return False
+    print("  OK: every accepted feedback event is in model_weights.json")
+    return True
+
+
+def start_gunicorn(port, workers, threads):
+    """
+    Launch gunicorn from a scratch copy of the data files so feedback writes
+    land in a throwaway model_weights.json.
+    """
+    workdir = tempfile.mkdtemp(prefix="foodie_load_")
+    for name in ["recipes.json", "model_weights.json", "similar_recipes.npz"]:
+        src = os.path.join(BACKEND_DIR, name)
+        if os.path.exists(src):
+            shutil.copy(src, workdir)
+
+    cmd = [
+        sys.executable, "-m", "gunicorn",
+        "--chdir", workdir,
+        "--pythonpath", BACKEND_DIR,
+        "--workers", str(workers),
+        "--threads", str(threads),
+        "--bind", f"127.0.0.1:{port}",
+        "--log-level", "warning",
+        "app:app",
+    ]
+    print(f"Starting gunicorn: {' '.join(cmd)}")
+    proc = subprocess.Popen(cmd)
+    return proc, workdir
+
+
+def port_is_free(port):
+    """True if nothing is listening on 127.0.0.1:port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        # Same as gunicorn: TIME_WAIT sockets left by a previous run do not count
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.bind(("127.0.0.1", port))
+        except OSError:
+            return False
+    return True
+
+
+def wait_until_ready(base_url, timeout, proc=None):
+    """
+    Poll the server until it answers. Gives up immediately if the gunicorn
+    child has already exited (not installed, bad arguments, crash on import).
+    """
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc is not None and proc.poll() is not None:
+            print(f"gunicorn exited during startup with code {proc.returncode}.")
+            return False
+        try:
+            with urllib.request.urlopen(base_url + "/", timeout=2) as resp:
+                if resp.status == 200:
+                    return True
+        except Exception:
+            time.sleep(0.5)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Foodie Genie app")
+    parser.add_argument("--url", help="Target an already running server instead of starting gunicorn")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn worker processes")
+    parser.add_argument("--threads", type=int, default=1, help="gunicorn threads per worker")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=20, help="Test duration in seconds")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    initial_weights = {}
+    weights_path = os.path.join(BACKEND_DIR, "model_weights.json")
+    if os.path.exists(weights_path):
+        with open(weights_path, "r") as f:
+            initial_weights = json.load(f)
+
+    print("Building query pool from recipes.json...")
+    pool = build_query_pool(os.path.join(BACKEND_DIR, "recipes.json"))
+    print(f"{len(pool['vocab'])} vocabulary terms, {len(pool['pantries'])} pantry samples.")
+
+    proc = None
+    workdir = None
+    base_url = args.url
+    if not base_url:
+        base_url = f"http://127.0.0.1:{args.port}"
+        # Otherwise we would silently load test whatever already owns the port
+        if not port_is_free(args.port):
+            print(f"Port {args.port} is already in use; pick another with --port or target it with --url.")
+            return 1
+        proc, workdir = start_gunicorn(args.port, args.workers, args.threads)
+
+    try:
+        if not wait_until_ready(base_url, timeout=120, proc=proc):
+            print(f"Server at {base_url} did not become ready.")
+            return 1
+
+        print(f"Running {args.concurrency} users for {args.duration}s against {base_url}...")
+        stats = Stats()
+        deadline = time.time() + args.duration
+        users = [VirtualUser(base_url, pool, stats, args.timeout) for _ in range(args.concurrency)]
+        threads = [threading.Thread(target=u.run, args=(deadline,)) for u in users]
+
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stats.report(time.perf_counter() - start)
+
+        if workdir:
+            writes_ok = check_feedback_writes(
+                os.path.join(workdir, "model_weights.json"), initial_weights, stats.feedback)
+        else:
+            writes_ok = True
+            print("\nFeedback write path: not checked against an external --url server.")
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return 0 if writes_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
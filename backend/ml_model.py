@@ -1,11 +1,74 @@
 import re
 import json
 import os
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import combinations
+
+# Dataset facets that can narrow the candidate set before scoring
+CATEGORICAL_FACETS = ("diet", "course", "flavor_profile", "region", "cuisine")
+NUMERIC_FACETS = ("prep_time", "cook_time", "total_time", "rating")
+
+
+def _bitmap_from_indexes(indexes, size):
+    """
+    Build an int bitmap (bit i = recipe index i) in one go.
+    OR-ing bits into an int one at a time would copy it on every step.
+    """
+    bits = bytearray((size + 7) // 8)
+    for i in indexes:
+        bits[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def _indexes_from_bitmap(bitmap):
+    """Yield the recipe indexes set in a bitmap, in ascending order."""
+    bits = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    for byte_no, byte in enumerate(bits):
+        if byte:
+            for bit in range(8):
+                if byte >> bit & 1:
+                    yield (byte_no << 3) | bit
+
+
+class CompactRecipe:
+    """
+    Slim in-memory recipe record.
+    Ingredients are stored as vocabulary ids in an array('I') instead of
+    repeating the full ingredient strings for every recipe.
+    """
+    __slots__ = ('id', 'name', 'ingredient_ids', 'instructions')
+
+    def __init__(self, id, name, ingredient_ids, instructions):
+        self.id = id
+        self.name = name
+        self.ingredient_ids = ingredient_ids
+        self.instructions = instructions
+
 
 class RecipeRecommender:
     def __init__(self):
         self.recipes_list = []
-        self.normalization_map = {}
+        self.recipe_positions = {}  # str(recipe id) -> position in recipes_list
+        # Ingredient vocabulary: every canonical ingredient is stored once
+        # and referenced everywhere else by its integer id.
+        self.vocab = []       # id -> canonical ingredient
+        self.term_ids = {}    # known cleaned term (plural or singular) -> canonical id
+        self._normalization_map = None  # cached string view of term_ids, see normalization_map
+        # Composition matching: multi-word ingredients split into singular tokens
+        # Both token tables are flat arrays with offsets (CSR layout): the entries
+        # for key i are pool[offsets[i]:offsets[i + 1]].
+        self.token_ids = {}                      # token -> token id
+        self.token_offsets = array('I', [0])     # ingredient id -> range in token_pool
+        self.token_pool = array('I')             # token ids of each multi-word ingredient
+        self.posting_offsets = array('I', [0])   # token id -> range in posting_pool
+        self.posting_pool = array('I')           # multi-word ingredient ids using each token
+        self.common_norm_set = set()
+        self.common_ids = set()
+        # Facet indexes over recipe positions in recipes_list
+        self.facet_bitmaps = {}  # categorical facet -> {value: int bitmap, or array of indexes if rare}
+        self.facet_sorted = {}   # numeric facet -> (sorted values, matching recipe indexes)
         # Global Assumptions: "always available" ingredients
         self.COMMON_INGREDIENTS = {"salt", "oil", "water", "onion", "ginger", "garlic", "spices", "basic spices", "chilli", "red chilli", "turmeric"}
         
@@ -25,6 +88,9 @@ class RecipeRecommender:
             "corn flour": ["rice flour", "arrowroot powder"]
         }
         
+        # best_purchases() scores a purchase by enumerating its 2^k subsets
+        self.MAX_PURCHASE_K = 3
+
         self.weights = {} # For learning from users
         self.weights_file = "model_weights.json"
 
@@ -74,26 +140,278 @@ class RecipeRecommender:
             
         self.save_weights()
 
+    def get_recipe(self, recipe_id):
+        """CompactRecipe for an id, or None if unknown."""
+        pos = self.recipe_positions.get(str(recipe_id))
+        return self.recipes_list[pos] if pos is not None else None
+
+    @property
+    def normalization_map(self):
+        """
+        Read-only term -> canonical ingredient view of the interned vocabulary,
+        kept for callers that want plain strings. Built on first access after
+        train() and cached; hot paths should use term_ids / vocab directly.
+        """
+        if self._normalization_map is None:
+            self._normalization_map = {term: self.vocab[i] for term, i in self.term_ids.items()}
+        return self._normalization_map
+
+    def _intern(self, canonical, interned):
+        """
+        Return the vocabulary id of a canonical ingredient, adding it if new.
+        `interned` is the canonical -> id map used while training only.
+        """
+        iid = interned.get(canonical)
+        if iid is None:
+            iid = len(self.vocab)
+            canonical = sys.intern(canonical)
+            self.vocab.append(canonical)
+            interned[canonical] = iid
+        return iid
+
+    def _canonical_id(self, name):
+        """
+        Vocabulary id of `name` if it is itself a canonical ingredient, else None.
+        Canonical names map to their own id in term_ids.
+        """
+        iid = self.term_ids.get(name)
+        if iid is not None and self.vocab[iid] == name:
+            return iid
+        return None
+
     def train(self, recipes_data):
-        self.recipes_list = recipes_data
-        self.normalization_map = {}
+        self.recipes_list = []
+        self.recipe_positions = {}
+        self.vocab = []
+        self.term_ids = {}
+        self._normalization_map = None
+        self.token_ids = {}
         self.load_weights()
         
-        # Build normalization map
-        for rec in self.recipes_list:
-            if 'ingredients' in rec:
-                for ing in rec['ingredients']:
-                    norm = self._clean_text(ing)
-                    if norm:
-                        self.normalization_map[norm] = norm
-                        singular = self._singularize(norm)
-                        if singular != norm:
-                             self.normalization_map[singular] = singular
-                             self.normalization_map[norm] = singular
-                        else:
-                             self.normalization_map[norm] = norm
-                             
-        print(f"Model initialized. {len(self.normalization_map)} normalization terms loaded.")
+        # Pass 1: build the term -> canonical id map
+        cleaned_per_recipe = []
+        interned = {}
+        for rec in recipes_data:
+            cleaned = [self._clean_text(ing) for ing in rec.get('ingredients', [])]
+            cleaned_per_recipe.append(cleaned)
+            for norm in cleaned:
+                if norm:
+                    singular = self._singularize(norm)
+                    sid = self._intern(singular, interned)
+                    if singular != norm:
+                        self.term_ids[singular] = sid
+                    self.term_ids[norm] = sid
+
+        # Pass 2: store each recipe as a compact record of ingredient ids
+        for rec, cleaned in zip(recipes_data, cleaned_per_recipe):
+            ingredient_ids = array('I')
+            for n in cleaned:
+                iid = self.term_ids.get(n)
+                if iid is None:
+                    iid = self._intern(self._singularize(n), interned)
+                ingredient_ids.append(iid)
+            steps = rec.get('steps', ["Cook until done."])
+            self.recipe_positions[str(rec.get('id'))] = len(self.recipes_list)
+            self.recipes_list.append(CompactRecipe(
+                rec.get('id'),
+                rec.get('name'),
+                ingredient_ids,
+                steps[0] if steps else "Cook until done.",
+            ))
+
+        self._build_token_index()
+        self._build_facet_indexes(recipes_data)
+
+        # Common ingredients pass through the same pipeline as user input
+        self.common_norm_set = set(self.normalize_input(list(self.COMMON_INGREDIENTS)))
+        self.common_ids = {self._canonical_id(i) for i in self.common_norm_set} - {None}
+
+        print(f"Model initialized. {len(self.term_ids)} normalization terms, {len(self.vocab)} canonical ingredients loaded.")
+
+    def _build_facet_indexes(self, recipes_data):
+        """
+        Categorical facets become one bitmap per value (rare values, where a
+        bitmap would be mostly zeros, keep a sorted index array instead);
+        numeric facets become a sorted array of values with the matching
+        recipe indexes, so range filters are two binary searches. Recipes
+        without a value for a facet are simply absent from its index.
+        """
+        size = len(recipes_data)
+        postings = {facet: {} for facet in CATEGORICAL_FACETS}
+        numeric = {facet: [] for facet in NUMERIC_FACETS}
+
+        for idx, rec in enumerate(recipes_data):
+            for facet in CATEGORICAL_FACETS:
+                if facet == "cuisine":
+                    # "/Desserts/Pies/Apple Pie Recipes/" matches any of its levels
+                    path = rec.get('cuisine_path') or ""
+                    values = [part.strip().lower() for part in path.split('/') if part.strip()]
+                else:
+                    value = rec.get(facet)
+                    values = [str(value).strip().lower()] if value else []
+                for value in values:
+                    postings[facet].setdefault(value, []).append(idx)
+            for facet in NUMERIC_FACETS:
+                value = rec.get(facet)
+                if value is not None:
+                    numeric[facet].append((float(value), idx))
+
+        # A 4-byte index beats a size/8-byte bitmap below size/32 entries
+        self.facet_bitmaps = {
+            facet: {
+                value: _bitmap_from_indexes(idxs, size) if len(idxs) * 32 >= size else array('I', idxs)
+                for value, idxs in values.items()
+            }
+            for facet, values in postings.items()
+        }
+        self.facet_sorted = {}
+        for facet, pairs in numeric.items():
+            pairs.sort()
+            self.facet_sorted[facet] = (array('d', (v for v, _ in pairs)), array('I', (i for _, i in pairs)))
+
+    def facet_values(self, facet):
+        """Known values of a categorical facet, for building filter menus."""
+        return sorted(self.facet_bitmaps.get(facet, {}))
+
+    def filter_mask(self, filters):
+        """
+        Resolve filters into a bitmap of matching recipe indexes, or None when
+        there is nothing to filter on.
+        Categorical filters take a value or a list of values (any may match):
+            {"diet": "vegetarian", "course": ["dessert", "snack"]}
+        Numeric filters use min_/max_ prefixes:
+            {"max_total_time": 30, "min_rating": 4.5}
+        Different facets are combined with AND.
+        """
+        if not filters:
+            return None
+
+        size = len(self.recipes_list)
+        mask = (1 << size) - 1
+        for key, wanted in filters.items():
+            if wanted is None or wanted == [] or wanted == "":
+                continue
+            if key in CATEGORICAL_FACETS:
+                if isinstance(wanted, str):
+                    wanted = [wanted]
+                bitmaps = self.facet_bitmaps.get(key, {})
+                facet_mask = 0
+                for value in wanted:
+                    entry = bitmaps.get(str(value).strip().lower(), 0)
+                    if isinstance(entry, array):
+                        entry = _bitmap_from_indexes(entry, size)
+                    facet_mask |= entry
+                mask &= facet_mask
+            elif key[:4] in ("min_", "max_") and key[4:] in NUMERIC_FACETS:
+                values, indexes = self.facet_sorted[key[4:]]
+                if key.startswith("min_"):
+                    lo, hi = bisect_left(values, float(wanted)), len(values)
+                else:
+                    lo, hi = 0, bisect_right(values, float(wanted))
+                mask &= _bitmap_from_indexes(indexes[lo:hi], size)
+            else:
+                raise ValueError(f"Unknown filter: {key}")
+            if not mask:
+                break
+        return mask
+
+    def _build_token_index(self):
+        """
+        Precompute the tokens of multi-word canonical ingredients and an
+        inverted token -> ingredient index, so composition matching at query
+        time is a handful of set operations instead of per-recipe string work.
+        Single-word ingredients get an empty token range.
+        """
+        token_offsets = array('I', [0])
+        token_pool = array('I')
+        postings = []
+        for iid, ing in enumerate(self.vocab):
+            parts = ing.split()
+            if len(parts) >= 2:
+                tokens = set()
+                for part in parts:
+                    token = self._singularize(part)
+                    tid = self.token_ids.get(token)
+                    if tid is None:
+                        tid = len(self.token_ids)
+                        self.token_ids[sys.intern(token)] = tid
+                        postings.append([])
+                    tokens.add(tid)
+                for tid in sorted(tokens):
+                    token_pool.append(tid)
+                    postings[tid].append(iid)
+            token_offsets.append(len(token_pool))
+
+        posting_offsets = array('I', [0])
+        posting_pool = array('I')
+        for iids in postings:
+            posting_pool.extend(iids)
+            posting_offsets.append(len(posting_pool))
+
+        self.token_offsets = token_offsets
+        self.token_pool = token_pool
+        self.posting_offsets = posting_offsets
+        self.posting_pool = posting_pool
+
+    def composition_matches(self, available_norm_set):
+        """
+        Return ids of multi-word ingredients (e.g. "basmati rice") whose
+        tokens are all covered by the available ingredients.
+        """
+        available_tokens = set()
+        for ing in available_norm_set:
+            tid = self.token_ids.get(self._singularize(ing))
+            if tid is not None:
+                available_tokens.add(tid)
+
+        offsets, pool = self.posting_offsets, self.posting_pool
+        candidates = set()
+        for tid in available_tokens:
+            candidates.update(pool[offsets[tid]:offsets[tid + 1]])
+
+        offsets, pool = self.token_offsets, self.token_pool
+        return {
+            iid for iid in candidates
+            if available_tokens.issuperset(pool[offsets[iid]:offsets[iid + 1]])
+        }
+
+    def memory_report(self):
+        """
+        Approximate resident bytes held by each in-memory structure.
+        Objects shared between structures are only counted once, in the
+        first structure that references them.
+        """
+        seen = set()
+
+        def sizeof(obj):
+            if id(obj) in seen:
+                return 0
+            seen.add(id(obj))
+            size = sys.getsizeof(obj)
+            if isinstance(obj, dict):
+                size += sum(sizeof(k) + sizeof(v) for k, v in obj.items())
+            elif isinstance(obj, (list, tuple, set, frozenset)):
+                size += sum(sizeof(x) for x in obj)
+            elif isinstance(obj, CompactRecipe):
+                size += sizeof(obj.id)
+            return size
+
+        report = {
+            "vocab": sizeof(self.vocab),
+            "term_ids": sizeof(self.term_ids),
+            "ingredient_ids": sum(sizeof(r.ingredient_ids) for r in self.recipes_list),
+            "token_ids": sizeof(self.token_ids),
+            "token_tables": (sizeof(self.token_offsets) + sizeof(self.token_pool)
+                             + sizeof(self.posting_offsets) + sizeof(self.posting_pool)),
+        }
+        report["ingredient_data_total"] = sum(report.values())
+        report["recipe_records"] = sizeof(self.recipes_list) + sum(sizeof(r) for r in self.recipes_list)
+        report["facet_indexes"] = sizeof(self.facet_bitmaps) + sizeof(self.facet_sorted)
+        report["names"] = sum(sizeof(r.name) for r in self.recipes_list)
+        report["instructions"] = sum(sizeof(r.instructions) for r in self.recipes_list)
+        report["total"] = (report["ingredient_data_total"] + report["recipe_records"] + report["facet_indexes"]
+                           + report["names"] + report["instructions"])
+        return report
 
     def _clean_text(self, text):
         """
@@ -146,12 +464,12 @@ class RecipeRecommender:
         for part in parts:
             cleaned = self._clean_text(part)
             if cleaned:
-                if cleaned in self.normalization_map:
-                    normalized_result.add(self.normalization_map[cleaned])
+                if cleaned in self.term_ids:
+                    normalized_result.add(self.vocab[self.term_ids[cleaned]])
                 else:
                     singular = self._singularize(cleaned)
-                    if singular in self.normalization_map:
-                        normalized_result.add(self.normalization_map[singular])
+                    if singular in self.term_ids:
+                        normalized_result.add(self.vocab[self.term_ids[singular]])
                     else:
                         normalized_result.add(singular)
         return list(normalized_result)
@@ -178,47 +496,224 @@ class RecipeRecommender:
         
         return None, 0
 
-    def recommend(self, user_input_raw, top_n=50):
+    def _available_ids(self, user_norm_set):
+        """
+        Vocabulary ids the user can be assumed to have: their own
+        ingredients, the common ones, and multi-word ingredients whose
+        tokens are all covered.
+        """
+        available_ids = {self._canonical_id(i) for i in user_norm_set} - {None}
+        available_ids |= self.common_ids
+        # Multi-word ingredients count as available when all of their tokens are
+        available_ids |= self.composition_matches(user_norm_set | self.common_norm_set)
+        return available_ids
+
+    def _substitutable_ids(self, user_norm_set):
+        """
+        Vocabulary ids that check_substitutions() would cover with one of the
+        user's ingredients.
+        """
+        substitutable = {
+            self._canonical_id(ing)
+            for ing, subs in self.SUBSTITUTION_MAP.items()
+            if any(sub in user_norm_set for sub in subs)
+        }
+        substitutable.discard(None)
+        return substitutable
+
+    def _bought_as(self, name):
+        """The normalized ingredient a purchase of `name` adds to the pantry."""
+        normalized = self.normalize_input([name])
+        return normalized[0] if len(normalized) == 1 else None
+
+    def _purchase_options(self, iid, available_tokens):
+        """
+        Every way a missing ingredient can be covered by buying, as a list of
+        frozensets of item names, mirroring how recommend() matches:
+        the ingredient itself, any one of its substitutes, or the missing
+        tokens of a multi-word ingredient (composition match). Tokens are only
+        offered when they are ingredients in their own right, so "cooking
+        spray" is never covered by buying "cooking" and "spray".
+        """
+        ing = self.vocab[iid]
+        options = []
+        if ing and self._bought_as(ing) == ing:
+            options.append(frozenset((ing,)))
+        for sub in self.SUBSTITUTION_MAP.get(ing, []):
+            if self._bought_as(sub) == sub:
+                options.append(frozenset((sub,)))
+        if self.token_offsets[iid] != self.token_offsets[iid + 1]:
+            needed = set()
+            for part in ing.split():
+                token = self._singularize(part)
+                if self.token_ids[token] in available_tokens:
+                    continue
+                # Unicode fractions left over from quantities survive _clean_text as tokens
+                if token.isnumeric() or self._canonical_id(token) is None:
+                    needed = None
+                    break
+                bought = self._bought_as(token)
+                if bought is None or self._singularize(bought) != token:
+                    needed = None
+                    break
+                needed.add(token)
+            if needed:
+                options.append(frozenset(needed))
+        return options
+
+    def _missing_main_index(self, user_norm_set, k):
+        """
+        Index recipes by the purchases that make them cookable relative to
+        the pantry. A recipe whose missing main ingredients can each be
+        covered in several ways (directly, by a substitute, or by completing
+        a composition match) is filed under every minimal combination of at
+        most k items. Returns {frozenset(item names): array of recipe indexes}.
+        """
+        covered = self._available_ids(user_norm_set) | self._substitutable_ids(user_norm_set)
+        available_tokens = set()
+        for ing in user_norm_set | self.common_norm_set:
+            tid = self.token_ids.get(self._singularize(ing))
+            if tid is not None:
+                available_tokens.add(tid)
+
+        option_cache = {}
+        keys_cache = {}  # many recipes share the same missing set
+        index = {}
+        for idx, rec in enumerate(self.recipes_list):
+            missing = frozenset(rec.ingredient_ids).difference(covered)
+            if not missing:
+                continue
+            keys = keys_cache.get(missing)
+            if keys is None:
+                # Combine the options of each missing ingredient, dropping any
+                # combination that already needs more than k items
+                keys = {frozenset()}
+                for iid in missing:
+                    if iid not in option_cache:
+                        option_cache[iid] = self._purchase_options(iid, available_tokens)
+                    keys = {key | option for key in keys for option in option_cache[iid] if len(key | option) <= k}
+                    if not keys:
+                        break
+                keys = [key for key in keys if not any(other < key for other in keys)]
+                keys_cache[missing] = keys
+            for key in keys:
+                index.setdefault(key, array('I')).append(idx)
+        return index
+
+    def _unlocked_by(self, index, purchase):
+        """
+        Recipe indexes made cookable by buying `purchase`: every index entry
+        keyed by a subset of it. Only subsets of the (small) purchase are
+        enumerated, never combinations of the whole vocabulary.
+        """
+        unlocked = set()
+        items = sorted(purchase)
+        for size in range(1, len(items) + 1):
+            for subset in combinations(items, size):
+                unlocked.update(index.get(frozenset(subset), ()))
+        return sorted(unlocked)
+
+    def best_purchases(self, pantry, k=1, top_n=10):
+        """
+        Which k (or fewer) ingredients should the user buy to unlock the most
+        recipes? Candidates are the distinct purchase keys of the missing
+        ingredient index, ranked by how many recipes each unlocks (counting
+        recipes filed under any subset). Candidates smaller than k are then
+        greedily topped up with the best single-item buys.
+        k is clamped to MAX_PURCHASE_K, since scoring a purchase enumerates
+        its 2^k subsets.
+        """
+        k = min(k, self.MAX_PURCHASE_K)
+        if not self.recipes_list or k < 1:
+            return []
+
+        user_norm_set = set(self.normalize_input(pantry))
+        index = self._missing_main_index(user_norm_set, k)
+
+        # Single-item buys ranked by recipes unlocked, used for top-ups
+        singles = sorted(
+            (next(iter(key)) for key in index if len(key) == 1),
+            key=lambda item: len(index[frozenset((item,))]),
+            reverse=True,
+        )[:top_n]
+
+        scored = {}
+        for key in index:
+            if key not in scored:
+                scored[key] = len(self._unlocked_by(index, key))
+
+        ranked = sorted(scored, key=lambda key: (-scored[key], len(key), sorted(key)))[:top_n]
+
+        # Greedy top-up: extend each short candidate with whichever single
+        # buy adds the most recipes, until it reaches k items
+        for purchase in ranked:
+            while len(purchase) < k:
+                best, best_count = None, scored[purchase]
+                for item in singles:
+                    if item in purchase:
+                        continue
+                    extended = purchase | {item}
+                    if extended not in scored:
+                        scored[extended] = len(self._unlocked_by(index, extended))
+                    if scored[extended] > best_count:
+                        best, best_count = extended, scored[extended]
+                if best is None:
+                    break
+                purchase = best
+
+        ranked = sorted(scored, key=lambda key: (-scored[key], len(key), sorted(key)))[:top_n]
+
+        results = []
+        for purchase in ranked:
+            unlocked = self._unlocked_by(index, purchase)
+            results.append({
+                "buy": sorted(purchase),
+                "unlocks": len(unlocked),
+                "recipes": [
+                    {"id": str(self.recipes_list[idx].id), "recipe_name": self.recipes_list[idx].name}
+                    for idx in unlocked[:5]
+                ],
+            })
+        return results
+
+    def recommend(self, user_input_raw, top_n=50, filters=None):
         if not self.recipes_list:
             return []
+
+        # Narrow the candidate set with the facet indexes before any scoring
+        candidates = self.recipes_list
+        mask = self.filter_mask(filters)
+        if mask is not None:
+            candidates = [self.recipes_list[i] for i in _indexes_from_bitmap(mask)]
             
         # 1. Normalize User Input
         user_norm_list = self.normalize_input(user_input_raw)
         user_norm_set = set(user_norm_list)
         
-        # 2. Normalize Common Ingredients to match recipe/user normalization
-        # We process common ingredients through the same pipeline to ensure matching keys (e.g. "spices" -> "spic")
-        common_norm_list = self.normalize_input(list(self.COMMON_INGREDIENTS))
-        common_norm_set = set(common_norm_list)
+        # 2. Common ingredients were normalized once in train() through the same
+        # pipeline to ensure matching keys (e.g. "spices" -> "spic")
+        common_norm_set = self.common_norm_set
+        common_ids = self.common_ids
+        vocab = self.vocab
         
-        # Available = User + Common
-        available_set = user_norm_set.union(common_norm_set)
+        # Available = User + Common (+ composition matches), as vocabulary ids
+        available_ids = self._available_ids(user_norm_set)
         
         valid_recipes = [] # Confidence > 0
         closest_recipes = [] # Missing main ingredients
         
-        for rec in self.recipes_list:
-            rec_id = str(rec.get('id'))
-            rec_name = rec.get('name')
-            raw_ingredients = rec.get('ingredients', [])
-            instructions = rec.get('steps', ["Cook until done."])[0] # Assuming list of 1 string
-            
-            # Normalize Recipe Ingredients
-            rec_norm_list = []
-            for ing in raw_ingredients:
-                n = self._clean_text(ing)
-                # Map to canonical if possible
-                if n in self.normalization_map:
-                    n = self.normalization_map[n]
-                else:
-                    n = self._singularize(n)
-                rec_norm_list.append(n)
+        for rec in candidates:
+            rec_id = str(rec.id)
+            rec_name = rec.name
+            instructions = rec.instructions
             
-            rec_norm_set = set(rec_norm_list)
+            rec_ingredient_ids = rec.ingredient_ids
+            rec_id_set = set(rec_ingredient_ids)
             
             # Identify Main Ingredients
             # Main ingredients are those NOT in Common (Normalized)
-            main_ingredients = [i for i in rec_norm_list if i not in common_norm_set]
+            main_ingredients = [i for i in rec_ingredient_ids if i not in common_ids]
+            main_id_set = set(main_ingredients)
             
             # --- Check Rule 1: Missing Main Ingredients ---
             missing_main = []
@@ -229,10 +724,11 @@ class RecipeRecommender:
             substitutions = {}
             total_substitution_penalty = 0
             
-            for ing in rec_norm_set:
-                if ing in available_set:
+            for iid in rec_id_set:
+                ing = vocab[iid]
+                if iid in available_ids:
                     matched_ingredients.append(ing)
-                    if ing in main_ingredients:
+                    if iid in main_id_set:
                         matched_main_count += 1
                 else:
                     # Check Substitutions (Rule 3 & 4)
@@ -242,11 +738,11 @@ class RecipeRecommender:
                         matched_ingredients.append(f"{ing} (sub: {sub})")
                         total_substitution_penalty += penalty
                         # Count as matched main if it was a main ingredient
-                        if ing in main_ingredients:
+                        if iid in main_id_set:
                             matched_main_count += 1
                     else:
                         missing_ingredients.append(ing)
-                        if ing in main_ingredients:
+                        if iid in main_id_set:
                             missing_main.append(ing)
 
             # Rule 1: If ANY main ingredient is missing -> Closest
@@ -267,7 +763,7 @@ class RecipeRecommender:
             W_MAIN = 0.5
             W_PCT = 0.3
             
-            total_ingredients = len(rec_norm_set) if len(rec_norm_set) > 0 else 1
+            total_ingredients = len(rec_id_set) if len(rec_id_set) > 0 else 1
             total_main = len(main_ingredients) if len(main_ingredients) > 0 else 1
             
             main_match_ratio = matched_main_count / total_main
@@ -0,0 +1,227 @@
+"""
+Precomputed "similar recipes" table.
+
+Each recipe's ingredient set (common ingredients excluded) becomes a binary
+sparse vector; the k nearest neighbours by cosine similarity are computed
+once and stored alongside recipes.json, so serving "more like this" is a
+dictionary lookup. When recipes are added only the new rows (and the
+existing rows they displace) are recomputed.
+
+The server only loads the saved table. Run this offline from the backend
+folder after changing recipes.json to build or update it:
+    python similar_recipes.py
+"""
+import json
+import os
+import zlib
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.neighbors import NearestNeighbors
+from sklearn.preprocessing import normalize
+
+from ml_model import RecipeRecommender
+
+
+class SimilarRecipeIndex:
+    # Above this share of new recipes a full rebuild is cheaper than patching
+    INCREMENTAL_LIMIT = 0.1
+    # Candidate scores merged per batch in update() (rows x new recipes)
+    MERGE_CHUNK = 4_000_000
+
+    def __init__(self, path="similar_recipes.npz", k=10):
+        self.path = path
+        self.k = k
+        self.ids = np.zeros(0, dtype=np.int32)
+        self.signatures = np.zeros(0, dtype=np.uint32)
+        self.neighbors = np.zeros((0, k), dtype=np.int32)   # neighbour recipe ids, -1 padded
+        self.scores = np.zeros((0, k), dtype=np.float16)    # cosine similarity per neighbour
+        self.positions = {}                                 # str(recipe id) -> row
+
+    def similar(self, recipe_id):
+        """
+        Constant-time lookup of (neighbour recipe id, similarity) pairs,
+        most similar first. Unknown ids return an empty list.
+        """
+        row = self.positions.get(str(recipe_id))
+        if row is None:
+            return []
+        return [
+            (str(n), float(s))
+            for n, s in zip(self.neighbors[row], self.scores[row])
+            if n >= 0
+        ]
+
+    def _vectors(self, recommender):
+        """
+        L2-normalized binary recipe x ingredient matrix, plus a per-recipe
+        signature of the ingredient set used to spot edited recipes.
+        """
+        rows, cols = [], []
+        signatures = np.zeros(len(recommender.recipes_list), dtype=np.uint32)
+        for pos, rec in enumerate(recommender.recipes_list):
+            ingredient_ids = set(rec.ingredient_ids) - recommender.common_ids
+            rows.extend([pos] * len(ingredient_ids))
+            cols.extend(ingredient_ids)
+            names = sorted(recommender.vocab[i] for i in ingredient_ids)
+            signatures[pos] = zlib.crc32("\x1f".join(names).encode("utf-8"))
+        matrix = csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(len(recommender.recipes_list), max(len(recommender.vocab), 1)),
+        )
+        return normalize(matrix), signatures
+
+    def _nearest(self, matrix, query_positions):
+        """
+        k nearest rows of `matrix` for each query row, excluding the row itself.
+        Returns (neighbour positions, similarities), -1 / 0 padded.
+        """
+        n = matrix.shape[0]
+        result_pos = np.full((len(query_positions), self.k), -1, dtype=np.int32)
+        result_sim = np.zeros((len(query_positions), self.k), dtype=np.float32)
+        if n < 2 or len(query_positions) == 0:
+            return result_pos, result_sim
+
+        nn = NearestNeighbors(n_neighbors=min(self.k + 1, n), metric="cosine", algorithm="brute")
+        nn.fit(matrix)
+        distances, indexes = nn.kneighbors(matrix[query_positions])
+
+        for out_row, (query, dist_row, idx_row) in enumerate(zip(query_positions, distances, indexes)):
+            found = [(i, 1.0 - d) for i, d in zip(idx_row, dist_row) if i != query and d < 1.0]
+            for col, (i, sim) in enumerate(found[:self.k]):
+                result_pos[out_row, col] = i
+                result_sim[out_row, col] = sim
+        return result_pos, result_sim
+
+    def build(self, recommender):
+        """Full rebuild over every recipe in the recommender."""
+        matrix, signatures = self._vectors(recommender)
+        ids = np.array([int(rec.id) for rec in recommender.recipes_list], dtype=np.int32)
+        positions, sims = self._nearest(matrix, np.arange(len(ids)))
+
+        self.ids = ids
+        self.signatures = signatures
+        self.neighbors = np.where(positions >= 0, ids[positions], -1).astype(np.int32)
+        self.scores = sims.astype(np.float16)
+        self.positions = {str(rid): row for row, rid in enumerate(ids)}
+        print(f"Built similar-recipe table for {len(ids)} recipes.")
+
+    def update(self, recommender):
+        """
+        Bring the saved table up to date with the recommender's recipes.
+        Only additions are patched in place; removed or edited recipes (or a
+        different k) trigger a full rebuild. Returns True if the table changed.
+        """
+        if not self.load():
+            self.build(recommender)
+            return True
+
+        matrix, signatures = self._vectors(recommender)
+        ids = np.array([int(rec.id) for rec in recommender.recipes_list], dtype=np.int32)
+        current = {rid: pos for pos, rid in enumerate(ids.tolist())}
+
+        saved_positions = np.array([current.get(rid, -1) for rid in self.ids.tolist()], dtype=np.int64)
+        if (saved_positions < 0).any() or (signatures[saved_positions] != self.signatures).any():
+            self.build(recommender)
+            return True
+
+        is_new = np.ones(len(ids), dtype=bool)
+        is_new[saved_positions] = False
+        new_positions = np.flatnonzero(is_new)
+        if len(new_positions) == 0:
+            return False
+        if len(new_positions) > self.INCREMENTAL_LIMIT * len(ids):
+            self.build(recommender)
+            return True
+
+        # Re-order the saved rows to match the current recipe order
+        neighbors = np.full((len(ids), self.k), -1, dtype=np.int32)
+        scores = np.zeros((len(ids), self.k), dtype=np.float32)
+        neighbors[saved_positions] = self.neighbors
+        scores[saved_positions] = self.scores
+
+        # New recipes: full neighbour search against everything
+        positions, sims = self._nearest(matrix, new_positions)
+        neighbors[new_positions] = np.where(positions >= 0, ids[positions], -1)
+        scores[new_positions] = sims
+
+        # Existing recipes: only rows whose weakest neighbour (0 for an empty
+        # slot) is beaten by their best new match can change
+        block = (matrix[saved_positions] @ matrix[new_positions].T).tocsr()
+        best_new = block.max(axis=1).toarray().ravel()
+        changed = np.flatnonzero(best_new > scores[saved_positions].min(axis=1))
+        new_ids = ids[new_positions]
+        chunk = max(1, self.MERGE_CHUNK // len(new_positions))
+        for start in range(0, len(changed), chunk):
+            rows = changed[start:start + chunk]
+            pos = saved_positions[rows]
+            # Current neighbours followed by every new recipe; keep the top k
+            cand_scores = np.hstack([scores[pos], block[rows].toarray()])
+            cand_ids = np.hstack([neighbors[pos], np.broadcast_to(new_ids, (len(rows), len(new_ids)))])
+            top = np.argpartition(-cand_scores, self.k - 1, axis=1)[:, :self.k]
+            order = np.argsort(-np.take_along_axis(cand_scores, top, axis=1), axis=1, kind="stable")
+            top = np.take_along_axis(top, order, axis=1)
+            scores[pos] = np.take_along_axis(cand_scores, top, axis=1)
+            neighbors[pos] = np.where(scores[pos] > 0, np.take_along_axis(cand_ids, top, axis=1), -1)
+
+        self.ids = ids
+        self.signatures = signatures
+        self.neighbors = neighbors
+        self.scores = scores.astype(np.float16)
+        self.positions = {str(rid): row for row, rid in enumerate(ids)}
+        print(f"Updated similar-recipe table with {len(new_positions)} new recipes.")
+        return True
+
+    def missing(self, recommender):
+        """Number of the recommender's recipes that have no row in the table."""
+        return sum(1 for rec in recommender.recipes_list if str(rec.id) not in self.positions)
+
+    def save(self):
+        # Write to a temp file first so running servers never read a partial table
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(
+                f,
+                k=np.array([self.k]),
+                ids=self.ids,
+                signatures=self.signatures,
+                neighbors=self.neighbors,
+                scores=self.scores,
+            )
+        os.replace(tmp_path, self.path)
+
+    def load(self):
+        """Load the saved table. Returns False if missing, unreadable or built with another k."""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with np.load(self.path) as data:
+                if int(data["k"][0]) != self.k:
+                    return False
+                self.ids = data["ids"]
+                self.signatures = data["signatures"]
+                self.neighbors = data["neighbors"]
+                self.scores = data["scores"]
+        except Exception as e:
+            print(f"Error loading similar-recipe table: {e}")
+            return False
+        self.positions = {str(rid): row for row, rid in enumerate(self.ids)}
+        return True
+
+
+def main():
+    with open("recipes.json", "r") as f:
+        recipes = json.load(f)
+    recommender = RecipeRecommender()
+    recommender.train(recipes)
+
+    index = SimilarRecipeIndex()
+    if index.update(recommender):
+        index.save()
+        print(f"Saved to {index.path}")
+    else:
+        print(f"{index.path} is already up to date.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,68 @@
 from ml_model import RecipeRecommender
+from similar_recipes import SimilarRecipeIndex
 import json
+import os
+import tempfile
+
+import numpy as np
+
+def cookable_ids(rec, pantry):
+    return {r['id'] for r in rec.recommend(pantry, top_n=len(rec.recipes_list)) if r['can_cook']}
+
+def check_best_purchases(rec, pantry, k=2):
+    """
+    Every suggested purchase must unlock exactly as many recipes as
+    recommend() newly marks can_cook once those items are in the pantry.
+    """
+    print(f"Checking best_purchases for: {pantry} (k={k})")
+    before = cookable_ids(rec, pantry)
+    ok = True
+    for suggestion in rec.best_purchases(pantry, k=k):
+        newly_cookable = cookable_ids(rec, pantry + suggestion['buy']) - before
+        if len(newly_cookable) != suggestion['unlocks']:
+            ok = False
+            print(f"FAILED: buying {suggestion['buy']} claims {suggestion['unlocks']} recipes, recommend() unlocks {len(newly_cookable)}")
+    if ok:
+        print("SUCCESS: best_purchases counts match recommend().")
+    return ok
+
+def check_similar_update(recipes, new_share=0.05):
+    """
+    Patching the similar-recipe table with new recipes must give the same
+    table as a full rebuild. Ties at a row's weakest score may be broken
+    differently, so neighbours are compared above that score only.
+    """
+    split = len(recipes) - max(1, int(len(recipes) * new_share))
+    print(f"Checking similar-recipe update: {split} saved + {len(recipes) - split} new recipes")
+    before = RecipeRecommender()
+    before.train(recipes[:split])
+    after = RecipeRecommender()
+    after.train(recipes)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        patched = SimilarRecipeIndex(os.path.join(tmp, "similar_recipes.npz"))
+        patched.build(before)
+        patched.save()
+        patched.update(after)
+    rebuilt = SimilarRecipeIndex()
+    rebuilt.build(after)
+
+    ok = True
+    for rid in rebuilt.positions:
+        expected, got = rebuilt.similar(rid), patched.similar(rid)
+        expected_scores = np.array([s for _, s in expected])
+        got_scores = np.array([s for _, s in got])
+        if len(expected_scores) != len(got_scores) or not np.allclose(expected_scores, got_scores, atol=1e-3):
+            ok = False
+        elif expected:
+            cutoff = expected_scores[-1] + 1e-3
+            if {n for n, s in expected if s > cutoff} != {n for n, s in got if s > cutoff}:
+                ok = False
+        if not ok:
+            print(f"FAILED: recipe {rid} neighbours after update {got}, after rebuild {expected}")
+            return ok
+    print("SUCCESS: update() matches build().")
+    return ok
 
 def test_model():
     print("Loading data...")
@@ -25,9 +88,13 @@ def test_model():
     if results:
         print("SUCCESS: Recommendations generated:")
         for r in results:
-            print(f"- {r['name']} (Score: {r['score']:.2f})")
+            print(f"- {r['recipe_name']} (Score: {r['confidence_score']})")
     else:
         print("WARNING: No recommendations found (this might be normal if randomness was unlucky, but unlikely with 1000+ recipes).")
 
+    check_best_purchases(rec, ["egg", "milk", "flour", "sugar", "butter"], k=2)
+    check_best_purchases(rec, ["rice", "chicken", "tomato"], k=3)
+    check_similar_update(recipes)
+
 if __name__ == "__main__":
     test_model()